@@ -72,6 +72,9 @@ class AutoLUT:
 # LUT engine status?
 ALL_LUTE_BUSY = 0xFFFF
 
+# 1bpp bitmap mode enable: bit 18 of UP1SR (bit 2 of the word at UP1SR+2)
+UP1SR_1BPP = 1 << 2
+
 class Registers:
     DBASE = 0x1000           # base address. register RW access for I80 only
 
@@ -3,8 +3,9 @@ import displayio
 import random
 import adafruit_imageload
 
-from .constants import DisplayModes
+from .constants import DisplayModes, Rotate
 from .interface import EPD
+from .spatial import TileIndex
 
 
 class AutoDisplay:
@@ -25,6 +26,13 @@ class AutoDisplay:
         print(f"getting display dims {width} x {height}, fetched from IT8951.")
 
         
+        # spatial index of the visible tiles, so that a changed region can be
+        # redrawn without walking the whole displayio tree
+        self.tile_index = TileIndex(width, height)
+
+        # gray value of display areas that no tile covers
+        self.background = 0xF
+
         self.setup_display_groups(width, height)  # configure the display buffers
 
         self.frame_buf = displayio.Bitmap(width, height, 0x10)  # 4 bit grayscale
@@ -67,11 +75,167 @@ class AutoDisplay:
         self.text_labels = displayio.Group()
         self.root_group.append(self.text_labels)
 
+        self.index_tiles()
+
+    def index_tiles(self):
+        '''
+        Rebuild the tile index from root_group. The z-order of the tiles follows the
+        normal drawing order of the displayio groups.
+
+        The index does not observe the displayio tree: after changing it directly,
+        report every change with tile_changed or tile_removed (or use add_item,
+        move_item, set_hidden and remove_item, which do both), otherwise draw_region
+        will draw stale contents.
+        '''
+        self.tile_index.clear()
+        self._parents = {}
+        self._group_states = {}
+        self._group_paths = {}
+
+        self._index_root()
+
+    def _index_root(self):
+        # the root group has no parent; its children are placed relative to the panel
+        root = self.root_group
+        self._group_states[id(root)] = self._child_state(root, (0, 0, 1, False))
+        self._group_paths[id(root)] = ()
+        for child_index, item in enumerate(root):
+            self._index_item(item, root, (child_index,))
+
+    def _child_state(self, group, parent):
+        # (origin_x, origin_y, scale, hidden) of the children of group, in panel coordinates
+        origin_x, origin_y, scale, hidden = parent
+        return (origin_x + group.x*scale, origin_y + group.y*scale,
+                scale*group.scale, hidden or group.hidden)
+
+    def _parent_state(self, parent):
+        try:
+            return self._group_states[id(parent)]
+        except KeyError:
+            raise ValueError("parent group is not in the tile index; add it first") from None
+
+    def _index_item(self, item, parent, path):
+        # index item (a TileGrid or Group) as a child of parent. path holds the child
+        # indices from root_group down to item, and sorts in drawing order, so it is
+        # used as the z-order of tiles
+        state = self._parent_state(parent)
+        self._parents[id(item)] = parent
+
+        if isinstance(item, displayio.TileGrid):
+            self.tile_index.update(item, state, path)
+        elif isinstance(item, displayio.Group):
+            self._group_states[id(item)] = self._child_state(item, state)
+            self._group_paths[id(item)] = path
+            for child_index, child in enumerate(item):
+                self._index_item(child, item, path + (child_index,))
+
+    def _index_new_item(self, item, parent):
+        self._parent_state(parent)
+        child_index = parent.index(item)
+        if child_index == len(parent) - 1:
+            self._index_item(item, parent, self._group_paths[id(parent)] + (child_index,))
+        else:
+            # inserted before other items, which move up one place
+            self._renumber_children(parent)
+
+    def _renumber_children(self, group):
+        path = self._group_paths[id(group)]
+        for child_index, child in enumerate(group):
+            self._index_item(child, group, path + (child_index,))
+
+    def _remove_from_index(self, item):
+        # item has already been removed from its group; the items after it moved down
+        parent = self._parents.get(id(item))
+        self._unindex_item(item)
+        if parent is not None and id(parent) in self._group_paths:
+            self._renumber_children(parent)
+
+    def _unindex_item(self, item):
+        self._parents.pop(id(item), None)
+        if isinstance(item, displayio.TileGrid):
+            self.tile_index.remove(item)
+        elif isinstance(item, displayio.Group):
+            self._group_states.pop(id(item), None)
+            self._group_paths.pop(id(item), None)
+            for child in item:
+                self._unindex_item(child)
+
+    def _reindex_item(self, item):
+        # refresh a moved/hidden item, keeping the z-order of the tiles it holds
+        if item is self.root_group:
+            self._group_states[id(item)] = self._child_state(item, (0, 0, 1, False))
+            for child in item:
+                self._reindex_item(child)
+            return
+
+        try:
+            parent = self._parents[id(item)]
+        except KeyError:
+            raise ValueError("item is not in the tile index") from None
+        state = self._parent_state(parent)
+
+        if isinstance(item, displayio.TileGrid):
+            self.tile_index.update(item, state)
+        elif isinstance(item, displayio.Group):
+            self._group_states[id(item)] = self._child_state(item, state)
+            for child in item:
+                self._reindex_item(child)
+
+    def tile_changed(self, item, group=None):
+        '''
+        Update the tile index after item (a TileGrid or Group) has been moved, hidden,
+        shown or scaled. For items that are not yet indexed, group must be the
+        (indexed) group item was appended to.
+        '''
+        if item is self.root_group or id(item) in self._parents:
+            self._reindex_item(item)
+        else:
+            assert group is not None, "the parent group of a new item must be given"
+            self._index_new_item(item, group)
+
+    def tile_removed(self, item):
+        '''
+        Drop item (a TileGrid or Group) from the tile index after it has been removed
+        from its group
+        '''
+        self._remove_from_index(item)
+
+    def add_item(self, group, item):
+        '''
+        Append item (a TileGrid or Group) to group, and add it to the tile index
+        '''
+        self._parent_state(group)
+        group.append(item)
+        self._index_new_item(item, group)
+
+    def remove_item(self, group, item):
+        '''
+        Remove item from group, and from the tile index
+        '''
+        group.remove(item)
+        self._remove_from_index(item)
+
+    def move_item(self, item, x, y):
+        '''
+        Move item to (x, y) in the coordinates of its group, and update the tile index
+        '''
+        item.x = x
+        item.y = y
+        self._reindex_item(item)
+
+    def set_hidden(self, item, hidden):
+        '''
+        Hide or show item, and update the tile index
+        '''
+        item.hidden = hidden
+        self._reindex_item(item)
+
     # TODO: remove test function
     def draw_square(self, x, y, fill):
         self.splash_screen[0].x = x
         self.splash_screen[0].y = y
         self.splash_screen[0].bitmap.fill(fill)
+        self.tile_changed(self.splash_screen[0])
 
 
     def draw_full(self, mode=DisplayModes.GC16):
@@ -120,11 +284,101 @@ class AutoDisplay:
         else:
             self.update_buffer(pixels, xy, dims)
 
+    def draw_region(self, xy, dims, mode=DisplayModes.GC16):
+        '''
+        Redraw the rectangle at xy with size dims. The tiles intersecting the
+        rectangle are looked up in the tile index and composed in z-order on top of
+        the background, so that only the rectangle is transferred and refreshed.
+
+        The rectangle is clipped to the display, and its horizontal edges are widened to
+        multiples of 16 pixels, so that two-color regions can use the 1bpp transfer.
+        '''
+        width, height = self.display_dims
+        x0 = max(xy[0], 0) // 16 * 16
+        y0 = max(xy[1], 0)
+        x1 = min((xy[0] + dims[0] + 15) // 16 * 16, width)
+        y1 = min(xy[1] + dims[1], height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        region = displayio.Bitmap(x1 - x0, y1 - y0, 0x10)
+        region.fill(self.background)
+
+        for tile in self.tile_index.query((x0, y0), (x1 - x0, y1 - y0)):
+            self._compose_tile(region, (x0, y0), tile)
+
+        self.update(region, (x0, y0), (x1 - x0, y1 - y0), mode)
+
+    def _compose_tile(self, region, origin, tile):
+        # copy the part of tile that lies inside region (placed at origin on the panel),
+        # mapping its pixels through its palette and skipping transparent ones
+        x, y, scale = self.tile_index.placement(tile)
+        bx0, by0, bx1, by1 = self.tile_index.bounds(tile)
+
+        x0 = max(bx0, origin[0])
+        y0 = max(by0, origin[1])
+        x1 = min(bx1, origin[0] + region.width)
+        y1 = min(by1, origin[1] + region.height)
+
+        tile_width = tile.tile_width
+        tile_height = tile.tile_height
+        grid_width = tile_width*tile.width
+        grid_height = tile_height*tile.height
+        transpose, flip_x, flip_y = tile.transpose_xy, tile.flip_x, tile.flip_y
+
+        bitmap = tile.bitmap
+        bitmap_cols = bitmap.width // tile_width
+        grays = self._palette_grays(tile.pixel_shader)
+
+        for py in range(y0, y1):
+            for px in range(x0, x1):
+                # position within the tile grid, before transposing and flipping
+                lx = (px - x) // scale
+                ly = (py - y) // scale
+                if transpose:
+                    lx, ly = ly, lx
+                if flip_x:
+                    lx = grid_width - 1 - lx
+                if flip_y:
+                    ly = grid_height - 1 - ly
+
+                col, sx = divmod(lx, tile_width)
+                row, sy = divmod(ly, tile_height)
+                index = tile[col, row]
+                value = bitmap[(index % bitmap_cols)*tile_width + sx,
+                               (index // bitmap_cols)*tile_height + sy]
+
+                if grays is not None:
+                    value = grays[value]
+                    if value is None:
+                        continue
+                region[px - origin[0], py - origin[1]] = value
+
+    @staticmethod
+    def _palette_grays(shader):
+        '''
+        Return a list mapping the palette indices of shader to 4-bit gray values (None for
+        transparent entries), or None if shader is not a palette. Bitmaps without a
+        palette are assumed to hold 4-bit gray values already.
+        '''
+        if not isinstance(shader, displayio.Palette):
+            return None
+
+        grays = []
+        for i in range(len(shader)):
+            if shader.is_transparent(i):
+                grays.append(None)
+                continue
+            color = shader[i]
+            red, green, blue = (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+            grays.append(((299*red + 587*green + 114*blue) // 1000) >> 4)
+        return grays
+
     def clear(self):
         '''
         Clear display, device image buffer, and frame buffer (e.g. at startup)
         '''
-        self.fill(0xF)
+        self.fill(self.background)
     
     def fill(self, color):
         raise NotImplementedError
@@ -145,29 +399,99 @@ class AutoEPDDisplay(AutoDisplay):
     '''
 
     def __init__(self, epd=None, vcom=-2.06,
-                 bus=0, device=0, spi_hz=24000000,
-                 **kwargs):
+                 bus=0, device=0, spi_hz=24000000, load_rotate=Rotate.CW,
+                 bitmap_transfer=False, **kwargs):
 
-        epd = EPD(vcom=vcom)
+        if epd is None:
+            epd = EPD(vcom=vcom)
 
         self.epd = epd
+
+        # rotation the controller applies to the image data we load
+        self.load_rotate = load_rotate
+
+        # send two-color regions in update() at 1 bit per pixel (see update)
+        self.bitmap_transfer = bitmap_transfer
+
+        # areas shown from the bitmap buffer whose pixels are not in the image buffer
+        # yet, as (xy, dims, packed, foreground, background); they never overlap
+        self._bitmap_areas = []
+
         AutoDisplay.__init__(self, self.epd.width, self.epd.height, **kwargs)
 
     def update(self, data, xy, dims, mode=DisplayModes.GC16):
-        self.update_buffer(data, xy, dims)
-        self.show_buffer(xy, dims, mode)
+        '''
+        Load data into the area at xy with size dims, and display it using mode.
+
+        If bitmap_transfer is enabled, areas with at most two pixel values (text, line
+        art) whose x coordinate is a multiple of 8 and whose width is a multiple of 16
+        are sent at 1 bit per pixel instead of 4. Bitmaps can't be rotated by the
+        controller, so this is only done if load_rotate is Rotate.NONE. Such areas are
+        loaded into a separate bitmap buffer; their pixels are copied into the image
+        buffer (at 4bpp) only when a later update_buffer or show_buffer overlaps them.
+        The next load or display waits for a 1bpp update to finish.
+        '''
+        bitmap = None
+        if (self.bitmap_transfer and self.load_rotate == Rotate.NONE and xy[0] % 8 == 0 and
+                data.width == dims[0] and data.width % 16 == 0):
+            bitmap = self.epd.pack_bitmap(data)
+
+        if bitmap is None:
+            self.update_buffer(data, xy, dims)
+            self.show_buffer(xy, dims, mode)
+            return
+
+        packed, foreground, background = bitmap
+        self._sync_bitmap_areas(xy, dims, replaced=True)
+        self.epd.wait_display_ready()
+        self.epd.load_bitmap_area(packed, xy, dims)
+        self.epd.display_bitmap_area(xy, dims, foreground, background, mode)
+        self._bitmap_areas.append((xy, dims, packed, foreground, background))
+
+    def _sync_bitmap_areas(self, xy, dims, replaced=False):
+        '''
+        Copy the bitmap areas that overlap the area at xy with size dims into the image
+        buffer, so that it does not show the pixels from before a 1bpp update. If the area
+        is about to be replaced by a new load, bitmap areas that lie entirely inside it are
+        dropped instead.
+        '''
+        x0, y0 = xy
+        x1, y1 = x0 + dims[0], y0 + dims[1]
+
+        remaining = []
+        for area in self._bitmap_areas:
+            (ax0, ay0), (width, height) = area[0], area[1]
+            ax1, ay1 = ax0 + width, ay0 + height
+
+            if ax0 >= x1 or x0 >= ax1 or ay0 >= y1 or y0 >= ay1:
+                remaining.append(area)
+            elif not (replaced and x0 <= ax0 and y0 <= ay0 and ax1 <= x1 and ay1 <= y1):
+                self._restore_bitmap_area(area)
+        self._bitmap_areas = remaining
+
+    def _restore_bitmap_area(self, area):
+        xy, dims, packed, foreground, background = area
+
+        pixels = displayio.Bitmap(dims[0], dims[1], 0x10)
+        self.epd.unpack_bitmap(packed, foreground, background, pixels)
+
+        self.epd.wait_display_ready()
+        self.epd.load_img_area(pixels, rotate_mode=self.load_rotate, xy=xy, dims=dims)
 
     def update_buffer(self, data, xy, dims):
-        # send image to controller
+        # bring the image buffer up to date around the area, then send image to controller
+        self._sync_bitmap_areas(xy, dims, replaced=True)
         self.epd.wait_display_ready()
 
         self.epd.load_img_area(
             data,
+            rotate_mode=self.load_rotate,
             xy=xy,
             dims=dims
         )
 
     def show_buffer(self, xy, dims, mode=DisplayModes.GC16):
+        self._sync_bitmap_areas(xy, dims)
         self.epd.display_area(
             xy,
             dims,
@@ -177,6 +501,7 @@ class AutoEPDDisplay(AutoDisplay):
     def fill(self, color):
         # transmit single color for each pixel over SPI
         self.epd.load_single_color(color)
+        self._bitmap_areas = []
 
         # and show the fill color
         self.epd.display_area(
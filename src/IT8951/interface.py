@@ -39,6 +39,19 @@ class EPD:
 
         self._set_img_buf_base_addr(self.img_buf_address)
 
+        # 1bpp bitmaps are loaded into their own buffer behind the 8bpp image
+        # buffer, so that they don't overwrite the pixels of the image buffer
+        self.bitmap_buf_address = self.img_buf_address + self.width*self.height
+
+        # last value written to the bitmap (1bpp) color table, so that BGVR
+        # is only reprogrammed when the colors change
+        self.bitmap_colors = None
+
+        # UP1SR+2 value from before 1bpp mode was enabled, or None if it is disabled.
+        # 1bpp mode has to stay enabled until the update is done, so it is only
+        # disabled before the next load or display
+        self._up1sr_before_bitmap = None
+
     
         # enable I80 packed mode
         self.write_register(Registers.I80CPCR, 0x1)
@@ -75,6 +88,8 @@ class EPD:
             dimensions are assumed to be the dimensions of the display area.
         '''
 
+        self._end_bitmap_mode()
+
         endian_type = constants.EndianTypes.BIG
 
         if xy is None:
@@ -87,11 +102,108 @@ class EPD:
 
         self._load_img_end()
 
+    def load_bitmap_area(self, packed, xy, dims):
+        '''
+        Write a 1 bit per pixel bitmap (see EPD.pack_bitmap) to the bitmap buffer in
+        device memory. The area must be displayed with EPD.display_bitmap_area.
+
+        The bitmap buffer is separate from the image buffer used by EPD.load_img_area,
+        so loading a bitmap leaves the image buffer untouched; it also does not update
+        the image buffer for this area.
+
+        The data is transferred in 8bpp mode with every byte holding 8 pixels, so the x
+        coordinate must be a multiple of 8 and the width a multiple of 16. The data is
+        never rotated by the controller, as it would rotate whole bytes of 8 pixels.
+
+        Parameters
+        ----------
+
+        packed : bytes
+            The packed bitmap, 8 pixels per byte with the first pixel in the most
+            significant bit
+
+        xy : (int, int)
+            The x,y coordinates of the top-left corner of the area being pasted
+
+        dims : (int, int)
+            The dimensions of the area being pasted
+        '''
+
+        if xy[0] % 8 != 0:
+            raise ValueError("1bpp area must start at an x coordinate that is a multiple of 8")
+        if dims[0] % 16 != 0:
+            raise ValueError("1bpp area width must be a multiple of 16")
+
+        self._end_bitmap_mode()
+
+        endian_type = constants.EndianTypes.BIG
+        rotate_mode = constants.Rotate.NONE
+
+        self._set_img_buf_base_addr(self.bitmap_buf_address)
+
+        # in 8bpp units, each "pixel" holds 8 bitmap pixels
+        self._load_img_area_start(endian_type, rotate_mode, (xy[0]//8, xy[1]), (dims[0]//8, dims[1]),
+                                  pixel_format=PixelModes.M_8BPP)
+        self.spi.write_packed(packed)
+        self._load_img_end()
+
+        self._set_img_buf_base_addr(self.img_buf_address)
+
+    @staticmethod
+    def pack_bitmap(pixbuf):
+        '''
+        Pack pixbuf into 8 pixels per byte if it holds at most two pixel values.
+
+        Returns (packed, foreground, background), with the first pixel value as background
+        (0 bits) and the other one as foreground (1 bits), or None as soon as a third value
+        is found. pixbuf.width must be a multiple of 8, so that rows start on byte boundaries.
+        '''
+
+        npixels = pixbuf.width*pixbuf.height
+        if npixels == 0:
+            return None
+        assert pixbuf.width % 8 == 0, "bitmap width must be a multiple of 8"
+
+        packed = bytearray(npixels // 8)
+        background = pixbuf[0]
+        foreground = None
+
+        byte = 0
+        for i in range(npixels):
+            value = pixbuf[i]
+            byte <<= 1
+            if value != background:
+                if foreground is None:
+                    foreground = value
+                elif value != foreground:
+                    return None
+                byte |= 1
+            if i & 7 == 7:
+                packed[i >> 3] = byte
+                byte = 0
+
+        if foreground is None:
+            foreground = background
+        return (packed, foreground, background)
+
+    @staticmethod
+    def unpack_bitmap(packed, foreground, background, pixbuf):
+        '''
+        Fill pixbuf with the pixels of a bitmap packed by EPD.pack_bitmap
+        '''
+        for i in range(pixbuf.width*pixbuf.height):
+            if (packed[i >> 3] >> (7 - (i & 7))) & 1:
+                pixbuf[i] = foreground
+            else:
+                pixbuf[i] = background
+
     def load_single_color(self, color):
         '''
         Transmit single colour into framebuffer without allocating full m x n framebuffer
         in memory.
         '''
+        self._end_bitmap_mode()
+
         endian_type = constants.EndianTypes.BIG
         rotate_mode=constants.Rotate.NONE
         self._load_img_start(endian_type, rotate_mode)
@@ -107,8 +219,50 @@ class EPD:
         Update a portion of the display to whatever is currently stored in device memory
         for that region. Updated data can be written to device memory using EPD.write_img_area
         '''
+        self._end_bitmap_mode()
         self.spi.write_cmd(Commands.DPY_AREA, xy[0], xy[1], dims[0], dims[1], display_mode)
 
+    def display_bitmap_area(self, xy, dims, foreground, background, display_mode=DisplayModes.GC16):
+        '''
+        Update a portion of the display from the bitmap buffer (see EPD.load_bitmap_area).
+        The 1 and 0 bits are shown with the 4-bit gray values foreground and background.
+
+        Like EPD.display_area this returns right away; 1bpp mode is disabled again before
+        the next load or display, which first waits for this update to finish.
+        '''
+        self.set_bitmap_colors(foreground, background)
+
+        if self._up1sr_before_bitmap is None:
+            up1sr = self.read_register(Registers.UP1SR+2)
+            self.write_register(Registers.UP1SR+2, up1sr | constants.UP1SR_1BPP)
+            self._up1sr_before_bitmap = up1sr
+
+        address = self.bitmap_buf_address
+        self.spi.write_cmd(Commands.DPY_BUF_AREA, xy[0], xy[1], dims[0], dims[1], display_mode,
+                           address & 0xFFFF, address >> 16)
+
+    def _end_bitmap_mode(self):
+        if self._up1sr_before_bitmap is None:
+            return
+
+        # 1bpp mode must stay enabled until the update is done
+        self.wait_display_ready()
+        self.write_register(Registers.UP1SR+2, self._up1sr_before_bitmap & ~constants.UP1SR_1BPP)
+        self._up1sr_before_bitmap = None
+
+    def set_bitmap_colors(self, foreground, background):
+        '''
+        Program the bitmap (1bpp) color table with 4-bit gray values for the 1 (foreground)
+        and 0 (background) bits. The register is only written if the colors changed.
+        '''
+        colors = (foreground, background)
+        if colors == self.bitmap_colors:
+            return
+
+        # the table holds 8-bit gray values: foreground in the high byte
+        self.write_register(Registers.BGVR, ((foreground << 4) << 8) | (background << 4))
+        self.bitmap_colors = colors
+
     def update_system_info(self):
         '''
         Get information about the system, and store it in class attributes
@@ -0,0 +1,180 @@
+class TileIndex:
+    '''
+    A uniform grid over panel coordinates that keeps track of which visible
+    displayio.TileGrid objects cover which part of the display, so that a dirty
+    rectangle can be resolved to the tiles that intersect it without walking the
+    whole displayio tree.
+
+    Each tile is stored with its placement on the panel (the accumulated offset
+    and scale of its parent groups), whether any of its ancestors is hidden, and
+    its z-order (the order in which it is drawn; higher values are drawn on top).
+    Tiles are added, moved, hidden or removed incrementally with TileIndex.update
+    and TileIndex.remove.
+
+    Parameters
+    ----------
+
+    width, height : int
+        The dimensions of the panel in pixels
+
+    cell_size : int, optional
+        The size (in pixels) of a single square grid cell
+    '''
+
+    def __init__(self, width, height, cell_size=64):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+
+        # (cell_x, cell_y) -> {id(tile): tile}
+        self._cells = {}
+        # id(tile) -> (tile, (origin_x, origin_y, scale, hidden), (x0, y0, x1, y1), z)
+        self._entries = {}
+        self._next_z = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, tile):
+        return id(tile) in self._entries
+
+    def clear(self):
+        '''
+        Remove all tiles from the index
+        '''
+        self._cells = {}
+        self._entries = {}
+        self._next_z = 0
+
+    def update(self, tile, parent=None, z=None):
+        '''
+        Add tile to the index, or refresh its position after it has been moved,
+        hidden or changed.
+
+        parent is the state of the tile's parent group as (origin_x, origin_y, scale,
+        hidden): the panel coordinates of the group's origin, the accumulated scale of
+        the group and its ancestors, and whether the group or any ancestor is hidden.
+        If parent is omitted, the previous state is kept ((0, 0, 1, False) for new
+        tiles).
+
+        z can be any value that sorts in drawing order (e.g. an int, or a tuple of child
+        indices), as long as all tiles in the index use the same kind. If z is omitted, a
+        tile keeps its previous z-order, and new tiles get an int z above all int z
+        values used so far.
+        '''
+        key = id(tile)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if parent is None:
+                parent = entry[1]
+            if z is None:
+                z = entry[3]
+            self._unlink(key, entry[2])
+
+        if parent is None:
+            parent = (0, 0, 1, False)
+        if z is None:
+            z = self._next_z
+        if isinstance(z, int):
+            self._next_z = max(self._next_z, z + 1)
+
+        bbox = self._visible_bbox(tile, parent)
+        self._entries[key] = (tile, parent, bbox, z)
+        if bbox is not None:
+            for cell in self._cells_in(bbox):
+                self._cells.setdefault(cell, {})[key] = tile
+
+    def remove(self, tile):
+        '''
+        Remove tile from the index. Tiles that are not in the index are ignored.
+        '''
+        entry = self._entries.pop(id(tile), None)
+        if entry is not None:
+            self._unlink(id(tile), entry[2])
+
+    def placement(self, tile):
+        '''
+        Return (x, y, scale) of an indexed tile: the panel coordinates of its top-left
+        corner, and the scale it is drawn with
+        '''
+        origin_x, origin_y, scale, _ = self._entries[id(tile)][1]
+        return (origin_x + tile.x*scale, origin_y + tile.y*scale, scale)
+
+    def bounds(self, tile):
+        '''
+        Return the panel bounding box (x0, y0, x1, y1) of an indexed tile, or None if
+        the tile is hidden. The box is not clipped to the panel.
+        '''
+        return self._entries[id(tile)][2]
+
+    def query(self, xy, dims):
+        '''
+        Return the visible tiles that intersect the rectangle at xy with size dims,
+        sorted in z-order (bottom first). Only the grid cells covered by the rectangle
+        are visited, so the cost follows the size of the rectangle rather than the
+        number of tiles in the index.
+        '''
+        rect = (xy[0], xy[1], xy[0] + dims[0], xy[1] + dims[1])
+        if rect[0] >= rect[2] or rect[1] >= rect[3]:
+            return []
+
+        found = {}
+        for cell in self._cells_in(rect):
+            bucket = self._cells.get(cell)
+            if bucket:
+                for key in bucket:
+                    if key not in found:
+                        found[key] = self._entries[key]
+
+        hits = [entry for entry in found.values() if self._intersects(entry[2], rect)]
+        hits.sort(key=lambda entry: entry[3])
+        return [entry[0] for entry in hits]
+
+    def _visible_bbox(self, tile, parent):
+        origin_x, origin_y, scale, hidden = parent
+        if hidden or tile.hidden:
+            return None
+
+        width = tile.tile_width*tile.width
+        height = tile.tile_height*tile.height
+        if tile.transpose_xy:
+            width, height = height, width
+
+        x0 = origin_x + tile.x*scale
+        y0 = origin_y + tile.y*scale
+        x1 = x0 + width*scale
+        y1 = y0 + height*scale
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1, y1)
+
+    def _cells_in(self, rect):
+        # only cells on the panel are stored; tiles entirely off-screen cover none
+        x0, y0 = max(rect[0], 0), max(rect[1], 0)
+        x1, y1 = min(rect[2], self.width), min(rect[3], self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        size = self.cell_size
+        cx0, cy0 = x0 // size, y0 // size
+        cx1, cy1 = (x1 - 1) // size, (y1 - 1) // size
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                yield (cx, cy)
+
+    def _unlink(self, key, bbox):
+        if bbox is None:
+            return
+        for cell in self._cells_in(bbox):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._cells[cell]
+
+    @staticmethod
+    def _intersects(bbox, rect):
+        return (bbox is not None and
+                bbox[0] < rect[2] and rect[0] < bbox[2] and
+                bbox[1] < rect[3] and rect[1] < bbox[3])
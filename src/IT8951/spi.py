@@ -160,6 +160,28 @@ class SPI:
             self.cs.value = True
 
 
+    def write_packed(self, packed):
+        '''
+        Write already packed pixel data (an array of bytes, of even length) to the device
+        '''
+
+        # bytes per transfer, leaving room for the preamble and keeping whole 16 bit words
+        bytes_per_transfer = (self.max_transfer_size - 2) // 2 * 2
+
+        for block_start in range(0, len(packed), bytes_per_transfer):
+            block = packed[block_start:block_start+bytes_per_transfer]
+
+            transfer_data = bytearray(2 + len(block))
+
+            # preamble, indicating it is a "data" transmission
+            transfer_data[0] = 0x00
+            transfer_data[1] = 0x00
+            transfer_data[2:] = block
+
+            self.cs.value = False
+            self.spi_bus.write(transfer_data)
+            self.cs.value = True
+
     def read(self, numwords):
         '''
         Send preamble, and return a buffer of 16-bit unsigned ints of length count
@@ -0,0 +1,197 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+class Group:
+    '''
+    Minimal stand-in for displayio.Group
+    '''
+
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._items = []
+
+    def append(self, item):
+        self._items.append(item)
+
+    def insert(self, index, item):
+        self._items.insert(index, item)
+
+    def remove(self, item):
+        self._items.remove(item)
+
+    def index(self, item):
+        return self._items.index(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+
+class Bitmap:
+    '''
+    Minimal stand-in for displayio.Bitmap, indexed by (x, y) or linear index
+    '''
+
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self._pixels = [0]*(width*height)
+
+    def fill(self, value):
+        self._pixels = [value]*(self.width*self.height)
+
+    def _offset(self, index):
+        if isinstance(index, tuple):
+            return index[1]*self.width + index[0]
+        return index
+
+    def __getitem__(self, index):
+        return self._pixels[self._offset(index)]
+
+    def __setitem__(self, index, value):
+        self._pixels[self._offset(index)] = value
+
+
+class Palette:
+    '''
+    Minimal stand-in for displayio.Palette
+    '''
+
+    def __init__(self, color_count):
+        self._colors = [0]*color_count
+        self._transparent = set()
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        self._colors[index] = color
+
+    def make_transparent(self, index):
+        self._transparent.add(index)
+
+    def is_transparent(self, index):
+        return index in self._transparent
+
+
+class TileGrid:
+    '''
+    Minimal stand-in for displayio.TileGrid
+    '''
+
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1,
+                 tile_width=None, tile_height=None, default_tile=0, x=0, y=0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self.flip_x = False
+        self.flip_y = False
+        self.transpose_xy = False
+        self._tiles = [default_tile]*(width*height)
+
+    def __getitem__(self, index):
+        return self._tiles[index[1]*self.width + index[0]]
+
+    def __setitem__(self, index, value):
+        self._tiles[index[1]*self.width + index[0]] = value
+
+
+class FakeSPI:
+    '''
+    Stand-in for IT8951.spi.SPI that keeps registers in a dict, and logs commands,
+    register accesses and pixel transfers as tuples
+    '''
+
+    def __init__(self):
+        from IT8951.constants import Commands
+        self.commands = Commands
+        self.registers = {}
+        self.log = []
+        self._write_address = None
+        self._read_address = None
+
+    def write_cmd(self, cmd, *args):
+        if cmd == self.commands.REG_WR:
+            self._write_address = args[0]
+        elif cmd == self.commands.REG_RD:
+            self._read_address = args[0]
+            self.log.append(("read", args[0]))
+        else:
+            self.log.append(("cmd", cmd) + args)
+
+    def write_data(self, arr):
+        address, self._write_address = self._write_address, None
+        self.registers[address] = arr[0]
+        self.log.append(("write", address, arr[0]))
+
+    def read_int(self):
+        return self.registers.get(self._read_address, 0)
+
+    def write_packed(self, packed):
+        self.log.append(("packed", bytes(packed)))
+
+    def pack_and_write_pixels(self, pixbuf):
+        self.log.append(("pixels", pixbuf.width, pixbuf.height))
+
+    def write_single_color(self, length, color):
+        self.log.append(("single", length, color))
+
+
+def make_epd(width=128, height=128, img_buf_address=0x1000):
+    '''
+    Return an EPD that talks to a FakeSPI instead of the device
+    '''
+    from IT8951.interface import EPD
+
+    epd = EPD.__new__(EPD)
+    epd.spi = FakeSPI()
+    epd.width = width
+    epd.height = height
+    epd.img_buf_address = img_buf_address
+    epd.bitmap_buf_address = img_buf_address + width*height
+    epd.bitmap_colors = None
+    epd._up1sr_before_bitmap = None
+    return epd
+
+
+@pytest.fixture
+def displayio_stub(monkeypatch):
+    '''
+    Install stand-ins for displayio (and the unused adafruit_imageload) and return the
+    freshly imported IT8951.display module that uses them
+    '''
+    displayio = types.ModuleType("displayio")
+    displayio.Group = Group
+    displayio.Bitmap = Bitmap
+    displayio.Palette = Palette
+    displayio.TileGrid = TileGrid
+
+    monkeypatch.setitem(sys.modules, "displayio", displayio)
+    monkeypatch.setitem(sys.modules, "adafruit_imageload", types.ModuleType("adafruit_imageload"))
+    monkeypatch.delitem(sys.modules, "IT8951.display", raising=False)
+
+    import IT8951.display
+    return IT8951.display
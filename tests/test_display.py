@@ -0,0 +1,252 @@
+import pytest
+
+from conftest import Bitmap, Group, Palette, TileGrid, make_epd
+from IT8951.constants import Commands, PixelModes, Rotate
+
+
+def gray_palette():
+    # palette index i maps to 4-bit gray i
+    palette = Palette(0x10)
+    for i in range(0x10):
+        palette[i] = i*0x111111
+    return palette
+
+
+def solid_tile(gray, width, height, x=0, y=0):
+    bitmap = Bitmap(width, height, 0x10)
+    bitmap.fill(gray)
+    return TileGrid(bitmap, pixel_shader=gray_palette(), x=x, y=y)
+
+
+@pytest.fixture
+def disp(displayio_stub):
+    class Display(displayio_stub.AutoDisplay):
+        def update(self, data, xy, dims, mode):
+            self.updated = (data, xy, dims)
+
+    return Display(128, 128)
+
+
+def region_pixels(disp):
+    data, xy, dims = disp.updated
+    return [[data[x, y] for x in range(dims[0])] for y in range(dims[1])]
+
+
+def test_draw_region_composes_over_background(disp):
+    disp.add_item(disp.static_ui_group, solid_tile(5, 8, 4, x=4, y=2))
+    disp.draw_region((0, 0), (16, 8))
+
+    data, xy, dims = disp.updated
+    assert (xy, dims) == ((0, 0), (16, 8))
+    pixels = region_pixels(disp)
+    assert pixels[0][0] == disp.background
+    assert pixels[2][4] == 5
+    assert pixels[5][11] == 5
+    assert pixels[6][12] == disp.background
+
+
+def test_draw_region_widens_and_clips(disp):
+    disp.add_item(disp.static_ui_group, solid_tile(5, 30, 30, x=-10, y=-10))
+    disp.draw_region((-5, -5), (20, 30))
+
+    data, xy, dims = disp.updated
+    assert (xy, dims) == ((0, 0), (16, 25))
+    pixels = region_pixels(disp)
+    assert pixels[0][0] == 5
+    assert pixels[19][15] == 5
+    assert pixels[20][0] == disp.background
+
+
+def test_transparent_pixels_show_tiles_below(disp):
+    disp.add_item(disp.static_ui_group, solid_tile(5, 16, 4))
+
+    bitmap = Bitmap(16, 4, 0x10)
+    bitmap[3, 1] = 1
+    palette = Palette(2)
+    palette[1] = 0x000000
+    palette.make_transparent(0)
+    disp.add_item(disp.text_labels, TileGrid(bitmap, pixel_shader=palette))
+
+    disp.draw_region((0, 0), (16, 4))
+    pixels = region_pixels(disp)
+    assert pixels[1][3] == 0
+    assert pixels[0][0] == 5
+    assert pixels[1][4] == 5
+
+
+def test_group_offset_and_flip(disp):
+    bitmap = Bitmap(4, 1, 0x10)
+    for x in range(4):
+        bitmap[x, 0] = x
+    tile = TileGrid(bitmap, pixel_shader=gray_palette(), x=1)
+    tile.flip_x = True
+
+    label = Group(x=4, y=2)
+    disp.add_item(disp.text_labels, label)
+    disp.add_item(label, tile)
+    disp.draw_region((0, 0), (16, 4))
+
+    assert region_pixels(disp)[2][5:9] == [3, 2, 1, 0]
+
+
+def test_add_item_into_lower_group_keeps_z_order(disp):
+    disp.add_item(disp.text_labels, solid_tile(1, 16, 4))
+    disp.add_item(disp.splash_screen, solid_tile(9, 16, 4))
+
+    disp.draw_region((0, 0), (16, 4))
+    assert region_pixels(disp)[0][0] == 1
+
+    incremental = disp.tile_index.query((0, 0), (16, 4))
+    disp.index_tiles()
+    assert disp.tile_index.query((0, 0), (16, 4)) == incremental
+
+
+def test_remove_and_insert_keep_z_order(disp):
+    a = solid_tile(1, 16, 4)
+    b = solid_tile(2, 16, 4)
+    c = solid_tile(3, 16, 4)
+    disp.add_item(disp.static_ui_group, a)
+    disp.add_item(disp.static_ui_group, b)
+    disp.remove_item(disp.static_ui_group, a)
+    disp.add_item(disp.static_ui_group, c)
+    assert disp.tile_index.query((0, 0), (16, 4)) == [b, c]
+
+    disp.static_ui_group.insert(0, a)
+    disp.tile_changed(a, disp.static_ui_group)
+    assert disp.tile_index.query((0, 0), (16, 4)) == [a, b, c]
+
+
+def test_move_item(disp):
+    tile = solid_tile(5, 16, 4)
+    disp.add_item(disp.static_ui_group, tile)
+    disp.move_item(tile, 32, 0)
+
+    assert disp.tile_index.query((0, 0), (16, 4)) == []
+    assert disp.tile_index.query((32, 0), (16, 4)) == [tile]
+
+
+def test_hidden_groups(disp):
+    label = Group()
+    tile = solid_tile(5, 16, 4)
+    disp.add_item(disp.text_labels, label)
+    disp.add_item(label, tile)
+
+    disp.set_hidden(disp.text_labels, True)
+    disp.draw_region((0, 0), (16, 4))
+    assert region_pixels(disp)[0][0] == disp.background
+
+    disp.set_hidden(disp.text_labels, False)
+    assert disp.tile_index.query((0, 0), (16, 4)) == [tile]
+
+
+def test_root_group_can_be_hidden_and_moved(disp):
+    tile = solid_tile(5, 16, 4)
+    disp.add_item(disp.static_ui_group, tile)
+
+    disp.set_hidden(disp.root_group, True)
+    assert disp.tile_index.query((0, 0), (128, 128)) == []
+
+    disp.set_hidden(disp.root_group, False)
+    disp.move_item(disp.root_group, 16, 8)
+    assert disp.tile_index.bounds(tile) == (16, 8, 32, 12)
+
+
+def test_unindexed_parent_raises(disp):
+    with pytest.raises(ValueError):
+        disp.add_item(Group(), solid_tile(5, 16, 4))
+    with pytest.raises(ValueError):
+        disp.move_item(solid_tile(5, 16, 4), 0, 0)
+
+
+@pytest.fixture
+def epd_disp(displayio_stub):
+    return displayio_stub.AutoEPDDisplay(epd=make_epd(), load_rotate=Rotate.NONE,
+                                         bitmap_transfer=True)
+
+
+def two_color(width, height, third=None):
+    bitmap = Bitmap(width, height, 0x10)
+    bitmap.fill(0xF)
+    bitmap[1, 0] = 0x0
+    if third is not None:
+        bitmap[2, 0] = third
+    return bitmap
+
+
+def transfers(disp):
+    # (command, pixel format) of the loads, and the display commands, in order
+    result = []
+    for entry in disp.epd.spi.log:
+        if entry[:2] == ("cmd", Commands.LD_IMG_AREA):
+            result.append(("load", (entry[2] >> 4) & 0x3) + entry[3:])
+        elif entry[0] == "cmd" and entry[1] in (Commands.DPY_AREA, Commands.DPY_BUF_AREA):
+            result.append(entry[1:6])
+    return result
+
+
+def test_update_sends_two_color_areas_at_1bpp(epd_disp):
+    epd_disp.update(two_color(16, 2), (16, 4), (16, 2))
+    assert transfers(epd_disp) == [
+        ("load", PixelModes.M_8BPP, 2, 4, 2, 2),
+        (Commands.DPY_BUF_AREA, 16, 4, 16, 2),
+    ]
+
+
+@pytest.mark.parametrize("data, xy, dims, settings", [
+    (two_color(16, 2, third=0x7), (16, 4), (16, 2), {}),
+    (two_color(16, 2), (4, 4), (16, 2), {}),
+    (two_color(8, 2), (16, 4), (8, 2), {}),
+    (two_color(16, 2), (16, 4), (16, 2), {"bitmap_transfer": False}),
+    (two_color(16, 2), (16, 4), (16, 2), {"load_rotate": Rotate.CW}),
+])
+def test_update_falls_back_to_4bpp(epd_disp, data, xy, dims, settings):
+    for name, value in settings.items():
+        setattr(epd_disp, name, value)
+
+    epd_disp.update(data, xy, dims)
+    assert transfers(epd_disp) == [
+        ("load", PixelModes.M_4BPP) + xy + dims,
+        (Commands.DPY_AREA,) + xy + dims,
+    ]
+
+
+def test_bitmap_areas_are_restored_before_wider_shows(epd_disp):
+    epd_disp.update(two_color(16, 2), (16, 4), (16, 2))
+    epd_disp.epd.spi.log = []
+
+    epd_disp.show_buffer((0, 0), (64, 64))
+    assert transfers(epd_disp) == [
+        ("load", PixelModes.M_4BPP, 16, 4, 16, 2),
+        (Commands.DPY_AREA, 0, 0, 64, 64),
+    ]
+
+    # restored once only
+    epd_disp.epd.spi.log = []
+    epd_disp.show_buffer((0, 0), (64, 64))
+    assert transfers(epd_disp) == [(Commands.DPY_AREA, 0, 0, 64, 64)]
+
+
+def test_bitmap_areas_covered_by_new_loads_are_dropped(epd_disp):
+    epd_disp.update(two_color(16, 2), (16, 4), (16, 2))
+    epd_disp.update(two_color(16, 2), (16, 4), (16, 2))
+    epd_disp.epd.spi.log = []
+
+    epd_disp.update_buffer(Bitmap(32, 8, 0x10), (16, 0), (32, 8))
+    epd_disp.show_buffer((0, 0), (64, 64))
+    assert transfers(epd_disp) == [
+        ("load", PixelModes.M_4BPP, 16, 0, 32, 8),
+        (Commands.DPY_AREA, 0, 0, 64, 64),
+    ]
+
+
+def test_partly_overlapped_bitmap_areas_are_restored_first(epd_disp):
+    epd_disp.update(two_color(16, 2), (16, 4), (16, 2))
+    epd_disp.epd.spi.log = []
+
+    epd_disp.update_buffer(Bitmap(16, 6, 0x10), (24, 0), (16, 6))
+    epd_disp.update_buffer(Bitmap(16, 8, 0x10), (0, 0), (16, 8))
+    assert transfers(epd_disp) == [
+        ("load", PixelModes.M_4BPP, 16, 4, 16, 2),
+        ("load", PixelModes.M_4BPP, 24, 0, 16, 6),
+        ("load", PixelModes.M_4BPP, 0, 0, 16, 8),
+    ]
@@ -0,0 +1,125 @@
+import pytest
+
+from conftest import make_epd
+from IT8951.constants import (Commands, DisplayModes, EndianTypes, PixelModes, Registers,
+                              Rotate, UP1SR_1BPP)
+from IT8951.interface import EPD
+
+
+class Bitmap:
+    '''
+    Minimal stand-in for displayio.Bitmap with linear indexing
+    '''
+
+    def __init__(self, width, height, pixels):
+        self.width = width
+        self.height = height
+        self.pixels = pixels
+
+    def __getitem__(self, index):
+        return self.pixels[index]
+
+    def __setitem__(self, index, value):
+        self.pixels[index] = value
+
+
+def test_pack_bitmap_two_colors():
+    pixels = [0xF, 0x0]*8 + [0x0]*8 + [0xF]*8
+    packed, foreground, background = EPD.pack_bitmap(Bitmap(16, 2, pixels))
+
+    assert (foreground, background) == (0x0, 0xF)
+    assert bytes(packed) == bytes([0b01010101, 0b01010101, 0xFF, 0x00])
+
+
+def test_pack_bitmap_single_color():
+    packed, foreground, background = EPD.pack_bitmap(Bitmap(8, 1, [0x3]*8))
+
+    assert (foreground, background) == (0x3, 0x3)
+    assert bytes(packed) == b"\x00"
+
+
+def test_pack_bitmap_rejects_third_color():
+    assert EPD.pack_bitmap(Bitmap(8, 1, [0x0, 0xF, 0x7] + [0x0]*5)) is None
+
+
+def test_pack_bitmap_empty():
+    assert EPD.pack_bitmap(Bitmap(0, 0, [])) is None
+    assert EPD.pack_bitmap(Bitmap(16, 0, [])) is None
+
+
+def test_load_bitmap_area_uses_bitmap_buffer():
+    epd = make_epd()
+    bitmap_address = epd.bitmap_buf_address
+    epd.load_bitmap_area(b"\x00"*12, (16, 2), (32, 3))
+
+    arg0 = (EndianTypes.BIG << 8) | (PixelModes.M_8BPP << 4) | Rotate.NONE
+    assert epd.spi.log == [
+        ("write", Registers.LISAR+2, bitmap_address >> 16),
+        ("write", Registers.LISAR, bitmap_address & 0xFFFF),
+        ("cmd", Commands.LD_IMG_AREA, arg0, 2, 2, 4, 3),
+        ("packed", b"\x00"*12),
+        ("cmd", Commands.LD_IMG_END),
+        ("write", Registers.LISAR+2, epd.img_buf_address >> 16),
+        ("write", Registers.LISAR, epd.img_buf_address & 0xFFFF),
+    ]
+
+
+def test_load_bitmap_area_rejects_misaligned_areas():
+    epd = make_epd()
+    with pytest.raises(ValueError):
+        epd.load_bitmap_area(b"\x00"*4, (4, 0), (16, 2))
+    with pytest.raises(ValueError):
+        epd.load_bitmap_area(b"\x00"*3, (8, 0), (24, 1))
+    assert epd.spi.log == []
+
+
+def test_display_bitmap_area():
+    epd = make_epd()
+    epd.spi.registers[Registers.UP1SR+2] = 0x10
+    address = epd.bitmap_buf_address
+
+    epd.display_bitmap_area((16, 2), (32, 3), 0x0, 0xF, DisplayModes.A2)
+    assert epd.spi.log == [
+        ("write", Registers.BGVR, 0x00F0),
+        ("read", Registers.UP1SR+2),
+        ("write", Registers.UP1SR+2, 0x10 | UP1SR_1BPP),
+        ("cmd", Commands.DPY_BUF_AREA, 16, 2, 32, 3, DisplayModes.A2,
+         address & 0xFFFF, address >> 16),
+    ]
+
+    # same colors, and 1bpp mode still enabled: only the display command is sent
+    epd.spi.log = []
+    epd.display_bitmap_area((16, 2), (32, 3), 0x0, 0xF)
+    assert [entry[:2] for entry in epd.spi.log] == [("cmd", Commands.DPY_BUF_AREA)]
+
+    epd.spi.log = []
+    epd.display_bitmap_area((16, 2), (32, 3), 0x3, 0xC)
+    assert epd.spi.log[0] == ("write", Registers.BGVR, 0x30C0)
+
+
+def test_bitmap_mode_ends_before_next_display():
+    epd = make_epd()
+    epd.spi.registers[Registers.UP1SR+2] = 0x10
+    epd.display_bitmap_area((0, 0), (16, 1), 0x0, 0xF)
+
+    epd.spi.log = []
+    epd.display_area((0, 0), (16, 16))
+    assert epd.spi.log == [
+        ("read", Registers.LUTAFSR),  # wait for the 1bpp update to finish
+        ("write", Registers.UP1SR+2, 0x10 & ~UP1SR_1BPP),
+        ("cmd", Commands.DPY_AREA, 0, 0, 16, 16, 2),
+    ]
+
+    # nothing left to disable
+    epd.spi.log = []
+    epd.display_area((0, 0), (16, 16))
+    assert [entry[:2] for entry in epd.spi.log] == [("cmd", Commands.DPY_AREA)]
+
+
+def test_unpack_bitmap_round_trip():
+    pixels = [0xF, 0x0]*8 + [0x0]*8 + [0xF]*8
+    packed, foreground, background = EPD.pack_bitmap(Bitmap(16, 2, pixels))
+
+    unpacked = Bitmap(16, 2, [None]*32)
+    EPD.unpack_bitmap(packed, foreground, background, unpacked)
+    assert unpacked.pixels == pixels
@@ -0,0 +1,147 @@
+import pytest
+
+from IT8951.spatial import TileIndex
+
+
+class Tile:
+    '''
+    Minimal stand-in for a single-tile displayio.TileGrid
+    '''
+
+    def __init__(self, x, y, w, h):
+        self.x = x
+        self.y = y
+        self.tile_width = w
+        self.tile_height = h
+        self.width = 1
+        self.height = 1
+        self.hidden = False
+        self.transpose_xy = False
+
+
+@pytest.fixture
+def index():
+    return TileIndex(1872, 1404, cell_size=64)
+
+
+def test_query_returns_intersecting_tiles_in_z_order(index):
+    a = Tile(0, 0, 100, 100)
+    b = Tile(50, 50, 200, 200)
+    c = Tile(1000, 1000, 10, 10)
+    index.update(b, z=1)
+    index.update(a, z=0)
+    index.update(c, z=2)
+
+    assert index.query((60, 60), (5, 5)) == [a, b]
+    assert index.query((0, 0), (10, 10)) == [a]
+    assert index.query((500, 500), (10, 10)) == []
+
+
+def test_new_tiles_are_placed_on_top(index):
+    a = Tile(0, 0, 10, 10)
+    b = Tile(0, 0, 10, 10)
+    index.update(b)
+    index.update(a)
+    assert index.query((0, 0), (1, 1)) == [b, a]
+
+
+def test_move_keeps_z_order(index):
+    a = Tile(0, 0, 10, 10)
+    b = Tile(500, 500, 10, 10)
+    index.update(a)
+    index.update(b)
+
+    a.x, a.y = 505, 505
+    index.update(a)
+
+    assert index.query((0, 0), (20, 20)) == []
+    assert index.query((500, 500), (20, 20)) == [a, b]
+
+
+def test_hide_and_show(index):
+    a = Tile(0, 0, 10, 10)
+    index.update(a)
+
+    a.hidden = True
+    index.update(a)
+    assert index.query((0, 0), (10, 10)) == []
+    assert a in index
+
+    a.hidden = False
+    index.update(a)
+    assert index.query((0, 0), (10, 10)) == [a]
+
+
+def test_hidden_parent(index):
+    a = Tile(0, 0, 10, 10)
+    index.update(a, (0, 0, 1, True))
+    assert index.query((0, 0), (10, 10)) == []
+    assert index.bounds(a) is None
+
+    # the parent state is kept when the tile is updated without one
+    a.x = 5
+    index.update(a)
+    assert index.query((0, 0), (20, 20)) == []
+
+
+def test_parent_offset_and_scale(index):
+    a = Tile(2, 3, 10, 10)
+    index.update(a, (100, 200, 2, False))
+
+    assert index.placement(a) == (104, 206, 2)
+    assert index.bounds(a) == (104, 206, 124, 226)
+    assert index.query((0, 0), (50, 50)) == []
+    assert index.query((120, 220), (1, 1)) == [a]
+
+
+def test_transposed_tile_swaps_bounds(index):
+    a = Tile(0, 0, 10, 30)
+    a.transpose_xy = True
+    index.update(a)
+
+    assert index.bounds(a) == (0, 0, 30, 10)
+    assert index.query((20, 0), (1, 1)) == [a]
+    assert index.query((0, 20), (1, 1)) == []
+
+
+def test_remove(index):
+    a = Tile(0, 0, 10, 10)
+    index.update(a)
+    index.remove(a)
+    index.remove(a)  # removing twice is ignored
+
+    assert a not in index
+    assert len(index) == 0
+    assert index.query((0, 0), (10, 10)) == []
+    assert index._cells == {}
+
+
+def test_empty_rectangle(index):
+    index.update(Tile(0, 0, 10, 10))
+    assert index.query((0, 0), (0, 10)) == []
+    assert index.query((5, 5), (10, 0)) == []
+    assert index.query((5, 5), (-3, 4)) == []
+
+
+def test_partly_off_screen_tile_keeps_unclipped_bounds(index):
+    a = Tile(-10, -10, 30, 30)
+    index.update(a)
+
+    assert index.query((0, 0), (30, 30)) == [a]
+    assert index.bounds(a) == (-10, -10, 20, 20)
+
+
+def test_off_screen_tile_is_not_in_grid(index):
+    a = Tile(-100, 0, 50, 50)
+    b = Tile(1872, 0, 50, 50)
+    index.update(a)
+    index.update(b)
+
+    assert index.query((-200, -200), (3000, 3000)) == []
+    assert index._cells == {}
+
+
+def test_tile_spanning_cells_is_reported_once(index):
+    a = Tile(0, 0, 500, 500)
+    index.update(a)
+    assert index.query((0, 0), (1872, 1404)) == [a]